@@ -1,167 +1,470 @@
+import asyncio
+import functools
+import json
 import os
+import re
 import time
-from playwright.sync_api import sync_playwright, Cookie, TimeoutError as PlaywrightTimeoutError
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import unquote, urlparse
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
-def add_server_time(server_url="https://hub.weirdhost.xyz/server/79100dde"):
+HUB_URL = "https://hub.weirdhost.xyz"
+DEFAULT_SERVER_URL = "https://hub.weirdhost.xyz/server/79100dde"
+LOGIN_URL = "https://hub.weirdhost.xyz/auth/login" # 已更新为新的登录URL
+SESSION_COOKIE_NAME = 'remember_web_59ba36addc2b2f9401580f014c7f58ea4e30989d'
+ADD_BUTTON_SELECTOR = 'button:has-text("시간 추가")' # 已更新为新的按钮文本
+
+# 定义登录表单选择器 (Pterodactyl 面板通用，无需修改)
+EMAIL_SELECTOR = 'input[name="username"]'
+PASSWORD_SELECTOR = 'input[name="password"]'
+LOGIN_BUTTON_SELECTOR = 'button[type="submit"]'
+LOGIN_FORM_READY_JS = "([e, p, b]) => document.querySelector(e) && document.querySelector(p) && document.querySelector(b)"
+
+# Chromium 启动参数：关闭后台联网、节流、扩展等与单次自动化无关的功能
+CHROMIUM_ARGS = [
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AcceptCHFrame",
+    "--no-first-run",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-sync",
+    "--metrics-recording-only"
+]
+
+# 代理地址格式: scheme://[user[:pass]@]host:port
+_PROXY_RE = re.compile(r"^(?P<scheme>[a-z0-9+]+)://(?:(?P<user>[^:@/]+)(?::(?P<pw>[^@/]*))?@)?(?P<host>[^:/@]+):(?P<port>\d+)/?$", re.I)
+
+# 登录状态 (storage_state) 的最长复用时间，超过后重新登录
+STATE_MAX_AGE = 6 * 24 * 3600
+
+# 多服务器并发处理的上限，避免 SOCKS5 代理连接过多
+MAX_CONCURRENCY = 3
+
+# 不需要下载的资源类型与统计/监控域名，拦截后可减少经代理传输的流量
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+BLOCKED_URL_KEYWORDS = ("google-analytics", "doubleclick", "sentry", "hotjar", "gtag")
+
+# 在每次导航时注入的样式，禁用动画与过渡，避免可见性/可点击判断等待动画结束。
+# init script 在文档创建时即执行，此时 <html> 可能尚未插入，需等 documentElement 出现后再追加样式
+DISABLE_ANIMATIONS_SCRIPT = """(() => {
+  const inject = () => {
+    const s = document.createElement('style');
+    s.textContent = '*,*::before,*::after{animation:none!important;transition:none!important;scroll-behavior:auto!important;}';
+    (document.head || document.documentElement).appendChild(s);
+  };
+  if (document.documentElement) {
+    inject();
+  } else {
+    new MutationObserver((_, observer) => {
+      if (document.documentElement) {
+        observer.disconnect();
+        inject();
+      }
+    }).observe(document, {childList: true});
+  }
+})();"""
+
+# 出错截图参数：JPEG 且只截视口，编码比整页 PNG 快得多、文件也更小
+SNAPSHOT_ARGS = {'type': 'jpeg', 'quality': 60, 'full_page': False}
+
+@dataclass(frozen=True)
+class Config:
+    """从环境变量解析出的运行配置。"""
+    remember_cookie: Optional[str]
+    email: Optional[str]
+    password: Optional[str]
+    proxy_cfg: Optional[dict]
+    proxy_debug: bool
+    server_urls: tuple
+    state_path: str
+    debug_screenshots: bool
+    cdp_endpoint: Optional[str]
+
+def _playwright_proxy_config(proxy_server, proxy_username=None, proxy_password=None):
     """
-    尝试登录 hub.weirdhost.xyz 并点击 "시간 추가" 按钮。
-    优先使用 REMEMBER_WEB_COOKIE 进行会话登录，如果不存在则回退到邮箱密码登录。
-    支持通过 SOCKS5 代理运行。
-    此函数设计为每次GitHub Actions运行时执行一次。
+    将代理环境变量转换为 Playwright 的 proxy 配置，未配置代理时返回 None。
+    未写协议时默认 socks5://；地址中内嵌的用户名密码会被拆出并做百分号解码，PROXY_USERNAME/PROXY_PASSWORD 优先。
+    """
+    if not proxy_server:
+        return None
+    if "://" not in proxy_server:
+        proxy_server = f"socks5://{proxy_server}"
+    m = _PROXY_RE.match(proxy_server)
+    if not m:
+        # 非 scheme://[user[:pass]@]host:port 形式（如缺少端口），原样交给 Playwright
+        return {'server': proxy_server}
+    proxy_config = {
+        'server': f"{m.group('scheme').lower()}://{m.group('host')}:{m.group('port')}"
+    }
+    proxy_username = proxy_username or unquote(m.group('user') or '')
+    proxy_password = proxy_password or unquote(m.group('pw') or '')
+    # 如果提供了代理用户名和密码，添加认证信息；只提供其中一个时照常传递并给出警告
+    if bool(proxy_username) != bool(proxy_password):
+        print("警告: 代理认证信息只提供了用户名或密码其中之一，请检查代理配置。")
+    if proxy_username:
+        proxy_config['username'] = proxy_username
+    if proxy_password:
+        proxy_config['password'] = proxy_password
+    return proxy_config
+
+def _redact_userinfo(url):
+    """隐藏 URL 中的 user:pass@ 部分，避免代理凭据出现在日志中。"""
+    return re.sub(r"//[^/@]*@", "//***@", url)
+
+@functools.lru_cache(maxsize=1)
+def _load_config():
+    """读取并解析一次环境变量，之后的调用（重试/循环调用）直接复用结果。"""
+    return Config(
+        remember_cookie=os.environ.get('REMEMBER_WEB_COOKIE'),
+        email=os.environ.get('PTERODACTYL_EMAIL'),
+        password=os.environ.get('PTERODACTYL_PASSWORD'),
+        proxy_cfg=_playwright_proxy_config(
+            os.environ.get('PROXY_SERVER'),  # 格式: socks5://host:port
+            os.environ.get('PROXY_USERNAME'),  # 可选
+            os.environ.get('PROXY_PASSWORD'),  # 可选
+        ),
+        proxy_debug=bool(os.environ.get('PROXY_DEBUG')),
+        server_urls=tuple(u.strip() for u in os.environ.get('SERVER_URLS', '').split(',') if u.strip()),  # 可选，逗号分隔
+        state_path=os.environ.get('STATE_PATH', '/tmp/wh_state.json'),
+        debug_screenshots=os.environ.get('DEBUG_SCREENSHOTS', '1') == '1',  # 设为 0 关闭出错截图
+        cdp_endpoint=os.environ.get('CHROMIUM_CDP_WS'),  # 可选，常驻 Chromium 的 CDP 地址
+    )
+
+def _session_cookie(value):
+    """构造 remember_web 会话 Cookie。"""
+    return {
+        'name': SESSION_COOKIE_NAME,
+        'value': value,
+        'domain': 'hub.weirdhost.xyz',  # 已更新为新的域名
+        'path': '/',
+        'expires': int(time.time()) + 3600 * 24 * 365, # 设置一个较长的过期时间
+        'httpOnly': True,
+        'secure': True,
+        'sameSite': 'Lax'
+    }
+
+def _context_args(cfg):
+    """浏览器上下文参数：固定视口、阻止 Service Worker，减少后台流量；代理按上下文设置，便于复用同一个浏览器。"""
+    context_args = {
+        'viewport': {'width': 1280, 'height': 720},
+        'device_scale_factor': 1,
+        'service_workers': 'block',
+        'bypass_csp': True
+    }
+    if cfg.proxy_cfg:
+        context_args['proxy'] = cfg.proxy_cfg
+    return context_args
+
+def _load_state(cfg):
+    """
+    读取未过期的登录状态文件并校验其结构，返回可直接传给 storage_state 的 dict；
+    文件不存在、已过期、损坏或格式不对时返回 None（打印警告），回退到常规登录。
+    """
+    try:
+        if time.time() - os.path.getmtime(cfg.state_path) >= STATE_MAX_AGE:
+            return None
+    except OSError:
+        return None
+    try:
+        with open(cfg.state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if not (isinstance(state, dict) and isinstance(state.get('cookies', []), list)
+                and isinstance(state.get('origins', []), list)):
+            raise ValueError("不是有效的 storage_state 结构")
+        return state
+    except (OSError, ValueError) as e:
+        print(f"警告: 已保存的登录状态无法使用，将忽略: {e}")
+        return None
+
+async def _save_state(context, path):
+    """
+    保存登录状态。文件含会话 Cookie，仅以 0600 权限写入；
+    写入失败只打印警告，不影响已成功的任务结果。
+    """
+    try:
+        state = await context.storage_state()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)  # 文件已存在时 os.open 不会修改权限
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    except Exception as e:
+        print(f"警告: 保存登录状态失败: {e}")
+
+def _is_add_time_response(response, server_url):
+    """
+    判断响应是否为该服务器 "시간 추가" 接口的 POST 响应（URL 含 /api/ 与服务器 ID）。
+    不检查状态码，以便服务器拒绝（如冷却中、已达上限）时也能立即拿到响应并报告原因。
+    """
+    server_id = urlparse(server_url).path.rstrip('/').rsplit('/', 1)[-1]
+    return (response.request.method == "POST"
+            and "/api/" in response.url and server_id in response.url)
+
+def _is_login_page(url):
+    """是否被重定向到了登录/认证页面。"""
+    return "login" in url or "auth" in url
+
+async def _block_heavy_resources(route):
+    """拦截图片、字体、媒体、样式表和统计脚本请求，其余请求 (document/xhr/fetch/script) 正常放行。"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(k in request.url for k in BLOCKED_URL_KEYWORDS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def _snap(page, label):
+    """出错时截图为 <label>.jpg，可通过 DEBUG_SCREENSHOTS=0 关闭。"""
+    if _load_config().debug_screenshots:
+        await page.screenshot(path=f"{label}.jpg", **SNAPSHOT_ARGS)
+
+async def safe_goto(page, url, label, timeout=30000):
+    """导航到 url，超时时打印提示并截图 (goto_timeout_<label>.jpg)，返回是否成功。"""
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        print(f"[{label}] 页面加载超时（{timeout // 1000}秒）: {url}")
+        await _snap(page, f"goto_timeout_{label}")
+        return False
+
+async def _open_context(p, cfg):
+    """连接常驻浏览器或本地启动浏览器，返回已安装资源拦截与禁用动画脚本的上下文。"""
+    # 如果提供了代理服务器，上下文参数中会带上代理配置
+    if cfg.proxy_cfg:
+        print(f"检测到代理配置: {_redact_userinfo(cfg.proxy_cfg['server'])}")
+        if 'username' in cfg.proxy_cfg:
+            print("已配置代理认证信息。")
+    else:
+        print("未检测到代理配置，将直接连接。")
+
+    context_args = _context_args(cfg)
+
+    # 优先连接常驻的 Chromium（省去冷启动），否则本地启动浏览器
+    if cfg.cdp_endpoint:
+        print("检测到 CHROMIUM_CDP_WS，连接常驻浏览器...")
+        browser = await p.chromium.connect_over_cdp(cfg.cdp_endpoint)
+    else:
+        browser = await p.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+
+    # 如有可用的登录状态，新上下文从中恢复；Playwright 拒绝其内容时（如 Cookie 字段非法）回退到空上下文
+    context = None
+    state = _load_state(cfg)
+    if state:
+        try:
+            context = await browser.new_context(storage_state=state, **context_args)
+        except Exception as e:
+            print(f"警告: 载入已保存的登录状态失败，将忽略: {e}")
+    if context is None:
+        context = await browser.new_context(**context_args)
+
+    # 在任何导航之前安装资源拦截，上下文中的所有页面均可受益
+    await context.route("**/*", _block_heavy_resources)
+    await context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
+    # 已拦截大体积资源，30秒足以应对网络波动，代理失效时也能尽快失败
+    context.set_default_timeout(30000)
+    return context
+
+async def _login(page, cfg, server_url):
+    """
+    建立登录会话，返回是否成功。依次尝试：已保存的登录状态、REMEMBER_WEB_COOKIE、邮箱密码。
+    前两种方式直接访问 server_url 验证，成功时页面已停留在服务器页面。
     """
-    # 从环境变量获取登录凭据
-    remember_web_cookie = os.environ.get('REMEMBER_WEB_COOKIE')
-    pterodactyl_email = os.environ.get('PTERODACTYL_EMAIL')
-    pterodactyl_password = os.environ.get('PTERODACTYL_PASSWORD')
-    
-    # 从环境变量获取代理配置
-    proxy_server = os.environ.get('PROXY_SERVER')  # 格式: socks5://host:port
-    proxy_username = os.environ.get('PROXY_USERNAME')  # 可选
-    proxy_password = os.environ.get('PROXY_PASSWORD')  # 可选
+    context = page.context
+
+    # --- 方案零：上下文中已有从 storage_state 恢复的登录状态，直接访问服务器页面 ---
+    if await context.cookies(HUB_URL):
+        print(f"检测到已保存的登录状态，正在访问目标服务器页面: {server_url}")
+        await safe_goto(page, server_url, "server_state")
+        if not _is_login_page(page.url):
+            print("已通过保存的登录状态进入服务器页面。")
+            return True
+        print("已保存的登录状态失效，将回退到常规登录流程。")
+        await context.clear_cookies()
+
+    # --- 方案一：优先尝试使用 Cookie 会话登录 ---
+    if cfg.remember_cookie:
+        print("检测到 REMEMBER_WEB_COOKIE，尝试使用 Cookie 登录...")
+        await context.add_cookies([_session_cookie(cfg.remember_cookie)])
+        print(f"已设置 Cookie。正在访问目标服务器页面: {server_url}")
+
+        # 使用 'domcontentloaded' 以加快页面加载判断，然后依赖选择器等待确保元素加载
+        await safe_goto(page, server_url, "server_cookie")
+
+        # 检查是否因 Cookie 无效被重定向到登录页
+        if not _is_login_page(page.url):
+            print("Cookie 登录成功，已进入服务器页面。")
+            return True
+        print("Cookie 登录失败或会话已过期，将回退到邮箱密码登录。")
+        await context.clear_cookies()
+
+    # --- 方案二：如果 Cookie 方案失败或未提供，则使用邮箱密码登录 ---
+    if not (cfg.email and cfg.password):
+        print("错误: Cookie 无效，且未提供 PTERODACTYL_EMAIL 或 PTERODACTYL_PASSWORD。无法登录。")
+        return False
+
+    print(f"正在访问登录页面: {LOGIN_URL}")
+    if not await safe_goto(page, LOGIN_URL, "login"):
+        return False
+
+    print("等待登录表单元素加载...")
+    # 一次 wait_for_function 同时等待三个元素，代替三次独立的 wait_for_selector
+    await page.wait_for_function(
+        LOGIN_FORM_READY_JS,
+        arg=[EMAIL_SELECTOR, PASSWORD_SELECTOR, LOGIN_BUTTON_SELECTOR],
+        timeout=30000
+    )
+
+    print("正在填写邮箱和密码...")
+    await page.fill(EMAIL_SELECTOR, cfg.email)
+    await page.fill(PASSWORD_SELECTOR, cfg.password)
+
+    print("正在点击登录按钮...")
+    # 服务器端校验密码可能较慢，登录跳转保留 60 秒超时
+    async with page.expect_navigation(wait_until="domcontentloaded", timeout=60000):
+        await page.click(LOGIN_BUTTON_SELECTOR)
+
+    # 检查登录后是否成功
+    if _is_login_page(page.url):
+        alert = page.locator('.alert.alert-danger')
+        error_text = (await alert.inner_text()).strip() if await alert.count() > 0 else "未知错误，URL仍在登录页。"
+        print(f"邮箱密码登录失败: {error_text}")
+        await _snap(page, "login_fail_error")
+        return False
+    print("邮箱密码登录成功。")
+    return True
+
+async def _add_time(page, server_url, suffix=""):
+    """在已登录的页面上打开 server_url 并点击 "시간 추가" 按钮，返回是否成功。suffix 用于区分多服务器的截图文件名。"""
+    try:
+        # --- 确保当前位于正确的服务器页面 ---
+        # 只比较路径，忽略末尾斜杠、查询参数和片段，避免多余的导航
+        if urlparse(page.url).path.rstrip('/') != urlparse(server_url).path.rstrip('/'):
+            print(f"[{server_url}] 当前不在目标服务器页面，正在导航...")
+            if not await safe_goto(page, server_url, f"server_final{suffix}"):
+                return False
+            if _is_login_page(page.url):
+                print(f"[{server_url}] 导航失败，会话可能已失效，需要重新登录。")
+                await _snap(page, f"server_page_nav_fail{suffix}")
+                return False
+
+        # --- 核心操作：查找并点击 "시간 추가" 按钮 ---
+        print(f"[{server_url}] 正在查找并等待 '{ADD_BUTTON_SELECTOR}' 按钮...")
+        try:
+            # click 自带等待（可见、稳定、可用）与滚动，无需单独 wait_for
+            # 点击后等待服务器返回 POST 响应，代替固定的 sleep
+            add_button = page.locator(ADD_BUTTON_SELECTOR)
+            async with page.expect_response(lambda r: _is_add_time_response(r, server_url), timeout=40000) as resp_info:
+                await add_button.click(timeout=30000)
+            response = await resp_info.value
+            print(f"[{server_url}] 成功点击 '시간 추가' 按钮。")
+            if not response.ok:
+                try:
+                    body = (await response.text()).strip()[:500]
+                except Exception as e:
+                    body = f"<无法读取响应内容: {e}>"
+                print(f"[{server_url}] 错误: 服务器拒绝了操作 (HTTP {response.status}): {body}")
+                await _snap(page, f"add_time_rejected{suffix}")
+                return False
+            print(f"[{server_url}] 服务器已确认操作: {response.url}")
+            return True
+        except PlaywrightTimeoutError:
+            print(f"[{server_url}] 错误: 未找到 '시간 추가' 按钮、按钮不可见/不可点击，或服务器未确认操作。")
+            await _snap(page, f"add_6h_button_not_found{suffix}")
+            return False
+
+    except Exception as e:
+        print(f"[{server_url}] 执行过程中发生未知错误: {e}")
+        # 发生任何异常时都截图，以便调试
+        await _snap(page, f"general_error{suffix}")
+        return False
+
+async def add_server_time_async(urls, max_concurrency=MAX_CONCURRENCY):
+    """
+    登录 hub.weirdhost.xyz 并为 urls 中的每个服务器点击 "시간 추가" 按钮，全部成功时返回 True。
+    只打开一个上下文（共享登录 Cookie）并只登录一次，登录用的页面直接处理第一个服务器，
+    其余服务器各用独立页面，并发数受信号量限制且不超过 MAX_CONCURRENCY。
+    """
+    cfg = _load_config()
 
     # 检查是否提供了任何登录凭据
-    if not (remember_web_cookie or (pterodactyl_email and pterodactyl_password)):
+    if not (cfg.remember_cookie or (cfg.email and cfg.password)):
         print("错误: 缺少登录凭据。请设置 REMEMBER_WEB_COOKIE 或 PTERODACTYL_EMAIL 和 PTERODACTYL_PASSWORD 环境变量。")
         return False
+    if not urls:
+        return True
 
-    with sync_playwright() as p:
-        # 配置浏览器启动参数
-        browser_args = {
-            'headless': True
-        }
-        
-        # 如果提供了代理服务器，添加代理配置
-        if proxy_server:
-            print(f"检测到代理配置: {proxy_server}")
-            proxy_config = {
-                'server': proxy_server
-            }
-            # 如果提供了代理用户名和密码，添加认证信息
-            if proxy_username and proxy_password:
-                proxy_config['username'] = proxy_username
-                proxy_config['password'] = proxy_password
-                print("已配置代理认证信息。")
-            browser_args['proxy'] = proxy_config
-        else:
-            print("未检测到代理配置，将直接连接。")
-        
-        # 启动浏览器
-        browser = p.chromium.launch(**browser_args)
-        page = browser.new_page()
-        # 增加默认超时时间到90秒，以应对网络波动和慢加载
-        page.set_default_timeout(90000)
+    async with async_playwright() as p:
+        try:
+            context = await _open_context(p, cfg)
+        except Exception as e:
+            print(f"启动或连接浏览器失败: {e}")
+            return False
+        page = None
 
         try:
-            # --- 方案一：优先尝试使用 Cookie 会话登录 ---
-            if remember_web_cookie:
-                print("检测到 REMEMBER_WEB_COOKIE，尝试使用 Cookie 登录...")
-                session_cookie = {
-                    'name': 'remember_web_59ba36addc2b2f9401580f014c7f58ea4e30989d',
-                    'value': remember_web_cookie,
-                    'domain': 'hub.weirdhost.xyz',  # 已更新为新的域名
-                    'path': '/',
-                    'expires': int(time.time()) + 3600 * 24 * 365, # 设置一个较长的过期时间
-                    'httpOnly': True,
-                    'secure': True,
-                    'sameSite': 'Lax'
-                }
-                page.context.add_cookies([session_cookie])
-                print(f"已设置 Cookie。正在访问目标服务器页面: {server_url}")
-                
+            # --- 代理自检（仅在设置 PROXY_DEBUG 时执行，正常运行跳过以节省一次页面加载）---
+            if cfg.proxy_debug:
                 try:
-                    # 使用 'domcontentloaded' 以加快页面加载判断，然后依赖选择器等待确保元素加载
-                    page.goto(server_url, wait_until="domcontentloaded", timeout=90000)
-                except PlaywrightTimeoutError:
-                    print(f"页面加载超时（90秒）。")
-                    page.screenshot(path="goto_timeout_error.png")
-                
-                # 检查是否因 Cookie 无效被重定向到登录页
-                if "login" in page.url or "auth" in page.url:
-                    print("Cookie 登录失败或会话已过期，将回退到邮箱密码登录。")
-                    page.context.clear_cookies()
-                    remember_web_cookie = None # 标记 Cookie 登录失败，以便执行下一步
-                else:
-                    print("Cookie 登录成功，已进入服务器页面。")
-
-            # --- 方案二：如果 Cookie 方案失败或未提供，则使用邮箱密码登录 ---
-            if not remember_web_cookie:
-                if not (pterodactyl_email and pterodactyl_password):
-                    print("错误: Cookie 无效，且未提供 PTERODACTYL_EMAIL 或 PTERODACTYL_PASSWORD。无法登录。")
-                    browser.close()
-                    return False
+                    # 通过 APIRequestContext 直接请求（同样走上下文代理），无需渲染页面
+                    response = await context.request.get("https://api.ipify.org/", timeout=5000)
+                    print(f"出口 IP: {(await response.text()).strip()}")
+                except Exception as e:
+                    print(f"代理自检跳过: {e}")
 
-                login_url = "https://hub.weirdhost.xyz/auth/login" # 已更新为新的登录URL
-                print(f"正在访问登录页面: {login_url}")
-                page.goto(login_url, wait_until="domcontentloaded", timeout=90000)
-
-                # 定义选择器 (Pterodactyl 面板通用，无需修改)
-                email_selector = 'input[name="username"]' 
-                password_selector = 'input[name="password"]'
-                login_button_selector = 'button[type="submit"]'
-
-                print("等待登录表单元素加载...")
-                page.wait_for_selector(email_selector)
-                page.wait_for_selector(password_selector)
-                page.wait_for_selector(login_button_selector)
-
-                print("正在填写邮箱和密码...")
-                page.fill(email_selector, pterodactyl_email)
-                page.fill(password_selector, pterodactyl_password)
-
-                print("正在点击登录按钮...")
-                with page.expect_navigation(wait_until="domcontentloaded", timeout=60000):
-                    page.click(login_button_selector)
-
-                # 检查登录后是否成功
-                if "login" in page.url or "auth" in page.url:
-                    error_text = page.locator('.alert.alert-danger').inner_text().strip() if page.locator('.alert.alert-danger').count() > 0 else "未知错误，URL仍在登录页。"
-                    print(f"邮箱密码登录失败: {error_text}")
-                    page.screenshot(path="login_fail_error.png")
-                    browser.close()
-                    return False
-                else:
-                    print("邮箱密码登录成功。")
-
-            # --- 确保当前位于正确的服务器页面 ---
-            if page.url != server_url:
-                print(f"当前不在目标服务器页面，正在导航至: {server_url}")
-                page.goto(server_url, wait_until="domcontentloaded", timeout=90000)
-                if "login" in page.url:
-                    print("导航失败，会话可能已失效，需要重新登录。")
-                    page.screenshot(path="server_page_nav_fail.png")
-                    browser.close()
+            try:
+                page = await context.new_page()
+                if not await _login(page, cfg, urls[0]):
                     return False
+            except Exception as e:
+                print(f"登录过程中发生未知错误: {e}")
+                if page:
+                    await _snap(page, "general_error")
+                return False
 
-            # --- 核心操作：查找并点击 "시간 추가" 按钮 ---
-            add_button_selector = 'button:has-text("시간 추가")' # 已更新为新的按钮文本
-            print(f"正在查找并等待 '{add_button_selector}' 按钮...")
+            # 并发数限制在 1..MAX_CONCURRENCY 之间，避免 Semaphore(0) 导致死锁
+            sem = asyncio.Semaphore(max(1, min(max_concurrency, MAX_CONCURRENCY)))
+            multi = len(urls) > 1
 
-            try:
-                # 等待按钮变为可见且可点击
-                add_button = page.locator(add_button_selector)
-                add_button.wait_for(state='visible', timeout=30000)
-                add_button.click()
-                print("成功点击 '시간 추가' 按钮。")
-                time.sleep(5) # 等待5秒，确保操作在服务器端生效
+            async def run_one(index, url):
+                async with sem:
+                    # 第一个服务器复用登录页面（通常已停留在该服务器页面），其余各开新页面
+                    try:
+                        run_page = page if index == 0 else await context.new_page()
+                    except Exception as e:
+                        print(f"[{url}] 打开新页面失败: {e}")
+                        return False
+                    return await _add_time(run_page, url, f"_{index}" if multi else "")
+
+            results = await asyncio.gather(*(run_one(i, u) for i, u in enumerate(urls)))
+
+            # 保存登录状态，下次运行可直接复用（失效时会被新的状态覆盖）
+            if any(results):
+                await _save_state(context, cfg.state_path)
+            if all(results):
                 print("任务完成。")
-                browser.close()
-                return True
-            except PlaywrightTimeoutError:
-                print(f"错误: 在30秒内未找到或 '시간 추가' 按钮不可见/不可点击。")
-                page.screenshot(path="add_6h_button_not_found.png")
-                browser.close()
-                return False
+            return all(results)
+        finally:
+            # 只关闭本次的上下文，常驻浏览器保持运行以供下次复用
+            browser = context.browser
+            await context.close()
+            if not cfg.cdp_endpoint:
+                await browser.close()
 
-        except Exception as e:
-            print(f"执行过程中发生未知错误: {e}")
-            # 发生任何异常时都截图，以便调试
-            page.screenshot(path="general_error.png")
-            browser.close()
-            return False
+def add_server_time(server_url=DEFAULT_SERVER_URL):
+    """
+    尝试登录 hub.weirdhost.xyz 并点击 "시간 추가" 按钮。
+    优先使用已保存的登录状态或 REMEMBER_WEB_COOKIE 进行会话登录，如果都无效则回退到邮箱密码登录。
+    支持通过 SOCKS5 代理运行。
+    此函数设计为每次GitHub Actions运行时执行一次，是 add_server_time_async 的同步封装。
+    """
+    return asyncio.run(add_server_time_async([server_url]))
 
 if __name__ == "__main__":
     print("开始执行添加服务器时间任务...")
-    success = add_server_time()
+    success = asyncio.run(add_server_time_async(list(_load_config().server_urls) or [DEFAULT_SERVER_URL]))
     if success:
         print("任务执行成功。")
         exit(0)